@@ -32,6 +32,26 @@ if __name__ == "__main__":
         "--word_aggregation", help="word aggregation strategy", type=str
     )
     parser.add_argument("--bs", help="batch size", type=int)
+    parser.add_argument(
+        "--num_workers",
+        help="Number of processes loading the batches. The workers only index the "
+        "lines. The elmo embeddings are computed in the main process",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--prefetch_factor",
+        help="Number of batches loaded in advance by every worker. Needs pytorch 1.7 "
+        "when it is not 2",
+        type=int,
+        default=2,
+    )
+    parser.add_argument(
+        "--persistent_workers",
+        help="Keep the workers of the train, dev and test loaders alive across "
+        "epochs. Needs pytorch 1.7",
+        action="store_true",
+    )
     parser.add_argument("--lr", help="learning rate", type=float)
     parser.add_argument("--epochs", help="number of epochs", type=int)
     parser.add_argument(
@@ -65,8 +85,12 @@ if __name__ == "__main__":
         test_filename=test_filename,
     )
 
+    # the character CNN output of ELMO is precomputed for the training vocab
+    word_vocab = data_manager.namespace_to_vocab["tokens"]
     embedder = BowElmoEmbedder(
-        layer_aggregation=args.layer_aggregation, device=args.device
+        layer_aggregation=args.layer_aggregation,
+        device=args.device,
+        vocab_to_cache=word_vocab.get_idx2token_mapping().values(),
     )
 
     encoder = BOW_Encoder(
@@ -97,6 +121,9 @@ if __name__ == "__main__":
         save_every=args.save_every,
         log_train_metrics_every=args.log_train_metrics_every,
         device=torch.device(args.device),
+        num_workers=args.num_workers,
+        prefetch_factor=args.prefetch_factor,
+        persistent_workers=args.persistent_workers,
         train_metric=train_metric,
         validation_metric=dev_metric,
         test_metric=test_metric,
@@ -11,6 +11,7 @@ python ${SCRIPT_FILE} \
 --layer_aggregation last \
 --word_aggregation sum \
 --bs 10 \
+--num_workers 1 \
 --lr 1e-4 \
 --epochs 50 \
 --save_every 5 \
@@ -51,6 +51,10 @@ class Engine(ClassNursery):
         use_wandb: bool = False,
         sample_proportion: float = 1.0,
         seeds: Dict[str, int] = None,
+        pin_memory: bool = True,
+        num_workers: int = 1,
+        prefetch_factor: int = 2,
+        persistent_workers: bool = False,
     ):
         """ Engine runs the models end to end. It iterates through the train dataset and passes
         it through the model. During training it helps in tracking a lot of parameters for the run
@@ -122,6 +126,21 @@ class Engine(ClassNursery):
             Set the random_seed, pytorch_seed and numpy_seed
             Found in
             https://github.com/allenai/allennlp/blob/master/allennlp/common/util.py
+        pin_memory : bool
+            If True, the tensors in the batches are copied into page locked memory
+            by the DataLoader. This is used only when the ``device`` is a cuda device.
+            The batches of ``Line`` and ``Label`` objects hold no tensors, so this has
+            no effect for them. It is useful only for a ``collate_fn`` that returns tensors
+        num_workers : int
+            The number of worker processes used by the DataLoader to load the batches.
+            If 0, the batches are loaded in the main process
+        prefetch_factor : int
+            The number of batches loaded in advance by every worker. Used only
+            when ``num_workers`` is greater than 0. Values other than 2 need pytorch 1.7
+        persistent_workers : bool
+            If True, the workers of the DataLoader are not shut down at the end of
+            every epoch. Used only when ``num_workers`` is greater than 0.
+            Needs pytorch 1.7
         """
 
         if isinstance(device, str):
@@ -153,6 +172,7 @@ class Engine(ClassNursery):
         self.track_for_best = track_for_best
         self.collate_fn = collate_fn
         self.device = device
+        self.pin_memory = pin_memory and self.device.type == "cuda"
         self.best_track_value = None
         self.set_best_track_value(self.best_track_value)
         self.gradient_norm_clip_value = gradient_norm_clip_value
@@ -187,7 +207,9 @@ class Engine(ClassNursery):
         with open(self.save_dir.joinpath("hyperparams.json"), "w") as fp:
             json.dump(self.experiment_hyperparams, fp)
 
-        self.num_workers = 1
+        self.num_workers = num_workers
+        self.prefetch_factor = prefetch_factor
+        self.persistent_workers = persistent_workers
         self.model.to(self.device)
 
         self.train_loader = self.get_loader(self.train_dataset)
@@ -261,13 +283,25 @@ class Engine(ClassNursery):
         sample_size = int(np.floor(dataset_size * self.sample_proportion))
         indices = np.random.choice(range(dataset_size), size=sample_size, replace=False)
         sampler = SubsetRandomSampler(indices=indices)
+
+        # these options are available only from pytorch 1.7 and are not allowed
+        # without worker processes. They are passed only when they are changed
+        # from the pytorch defaults
+        worker_options = {}
+        if self.num_workers > 0:
+            if self.prefetch_factor != 2:
+                worker_options["prefetch_factor"] = self.prefetch_factor
+            if self.persistent_workers:
+                worker_options["persistent_workers"] = self.persistent_workers
+
         loader = DataLoader(
             dataset=dataset,
             batch_size=self.batch_size,
             num_workers=self.num_workers,
             collate_fn=self.collate_fn,
-            pin_memory=True,
+            pin_memory=self.pin_memory,
             sampler=sampler,
+            **worker_options,
         )
         return loader
 
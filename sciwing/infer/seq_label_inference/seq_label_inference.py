@@ -334,16 +334,13 @@ class SequenceLabellingInference(BaseSeqLabelInference):
                 f"Generating Science IE results for file {file_id}"
             ):
                 text = science_ie_data_utils.get_text_from_fileid(file_id)
-                sents = science_ie_data_utils.get_sents(text)
                 try:
                     assert bool(text.split()), f"File {file_id} does not have any text"
                 except AssertionError:
                     continue
 
-                try:
-                    assert len(sents) > 0
-                except AssertionError:
-                    continue
+                # a text that is not empty has at least one sentence
+                sents = science_ie_data_utils.get_sents(text)
 
                 conll_filepath = pred_folder.joinpath(f"{file_id}.conll")
                 ann_filepath = pred_folder.joinpath(f"{file_id}.ann")
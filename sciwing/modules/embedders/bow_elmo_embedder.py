@@ -1,7 +1,9 @@
 import torch
 from allennlp.commands.elmo import ElmoEmbedder
+from allennlp.modules.elmo import batch_to_ids
+from allennlp.nn.util import remove_sentence_boundaries
 import wasabi
-from typing import List, Union
+from typing import List, Union, Iterable, Optional, Tuple
 import torch.nn as nn
 from sciwing.utils.class_nursery import ClassNursery
 from sciwing.data.line import Line
@@ -9,6 +11,68 @@ from sciwing.data.datasets_manager import DatasetsManager
 from sciwing.modules.embedders.base_embedders import BaseEmbedder
 
 
+class _CachedElmoEmbedder(ElmoEmbedder):
+    """ Elmo Embedder that caches the output of the character CNN for a vocabulary.
+    Batches where all the words are in the vocabulary look up the cached representations
+    instead of running the character convolutions. Other batches run the
+    character convolutions as usual.
+    """
+
+    def __init__(self, vocab_to_cache: Iterable[str], cuda_device: int = -1):
+        super(_CachedElmoEmbedder, self).__init__(cuda_device=cuda_device)
+        # index 0 of the cached embedding is treated as padding by elmo
+        self.vocab_to_cache = ["<ELMO_CACHE_PAD>"] + list(dict.fromkeys(vocab_to_cache))
+        self.word_to_cache_idx = {
+            word: idx for idx, word in enumerate(self.vocab_to_cache) if idx > 0
+        }
+        self.elmo_bilm.create_cached_cnn_embeddings(self.vocab_to_cache)
+
+    def _batch_to_word_ids(self, batch: List[List[str]]) -> Optional[torch.Tensor]:
+        """ Returns the indices of the words in the cached vocab padded with 0
+        or None if some word in the batch is not cached
+        """
+        max_len = max(len(sentence) for sentence in batch)
+        word_ids = torch.zeros(len(batch), max_len, dtype=torch.long)
+        for sentence_idx, sentence in enumerate(batch):
+            for word_idx, word in enumerate(sentence):
+                cache_idx = self.word_to_cache_idx.get(word)
+                if cache_idx is None:
+                    return None
+                word_ids[sentence_idx, word_idx] = cache_idx
+        return word_ids
+
+    def batch_to_embeddings(
+        self, batch: List[List[str]]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        word_ids = self._batch_to_word_ids(batch)
+        if word_ids is None:
+            return super(_CachedElmoEmbedder, self).batch_to_embeddings(batch)
+
+        character_ids = batch_to_ids(batch)
+        if self.cuda_device >= 0:
+            character_ids = character_ids.cuda(device=self.cuda_device)
+            word_ids = word_ids.cuda(device=self.cuda_device)
+
+        bilm_output = self.elmo_bilm(character_ids, word_ids)
+        layer_activations = bilm_output["activations"]
+        mask_with_bos_eos = bilm_output["mask"]
+
+        # without_bos_eos is a 3 element list of (activation, mask) tensor pairs,
+        # each with size (batch_size, num_timesteps, dim) and (batch_size, num_timesteps)
+        # respectively.
+        without_bos_eos = [
+            remove_sentence_boundaries(layer, mask_with_bos_eos)
+            for layer in layer_activations
+        ]
+        # Converts a list of pairs (activation, mask) tensors to a single tensor of
+        # activations.
+        activations = torch.cat([ele[0].unsqueeze(1) for ele in without_bos_eos], dim=1)
+        # The mask is the same for each ELMo vector, so just take the first.
+        mask = without_bos_eos[0][1]
+
+        return activations, mask
+
+
 class BowElmoEmbedder(nn.Module, BaseEmbedder, ClassNursery):
     def __init__(
         self,
@@ -16,6 +80,7 @@ class BowElmoEmbedder(nn.Module, BaseEmbedder, ClassNursery):
         layer_aggregation: str = "sum",
         device: Union[str, torch.device] = torch.device("cpu"),
         word_tokens_namespace="tokens",
+        vocab_to_cache: Iterable[str] = None,
     ):
         """ Bag of words Elmo Embedder which aggregates elmo embedding for every token
 
@@ -40,6 +105,11 @@ class BowElmoEmbedder(nn.Module, BaseEmbedder, ClassNursery):
 
         word_tokens_namespace: int
             Namespace where all the word tokens are stored
+
+        vocab_to_cache: Iterable[str]
+            The words for which the output of the character CNN of ELMO is precomputed.
+            Batches that contain only these words skip the character convolutions.
+            If None, no words are cached
         """
         super(BowElmoEmbedder, self).__init__()
         self.dataset_manager = datasets_manager
@@ -67,7 +137,12 @@ class BowElmoEmbedder(nn.Module, BaseEmbedder, ClassNursery):
 
         # load the elmo embedders
         with self.msg_printer.loading("Creating Elmo object"):
-            self.elmo = ElmoEmbedder(cuda_device=self.cuda_device_id)
+            if vocab_to_cache is None:
+                self.elmo = ElmoEmbedder(cuda_device=self.cuda_device_id)
+            else:
+                self.elmo = _CachedElmoEmbedder(
+                    vocab_to_cache=vocab_to_cache, cuda_device=self.cuda_device_id
+                )
         self.msg_printer.good("Finished Loading Elmo object")
 
     def forward(self, lines: List[Line]) -> torch.Tensor:
@@ -86,66 +161,47 @@ class BowElmoEmbedder(nn.Module, BaseEmbedder, ClassNursery):
 
 
         """
-        # [np.array] - A generator of embeddings
-        # each array in the list is of the shape (3, #words_in_sentence, 1024)
-
         batch_tokens = []
-        token_lengths = []
         for line in lines:
             line_tokens = line.tokens[self.word_tokens_namespace]
             line_tokens = [tok.text for tok in line_tokens]
             batch_tokens.append(line_tokens)
-            token_lengths.append(len(line_tokens))
-
-        max_len = max(token_lengths)
-        embedded = list(self.elmo.embed_sentences(batch_tokens))
 
-        batch_embeddings = []
+        # batch_size, 3, max_num_words, 1024
+        # The embeddings for the padded words are zeros
+        embedding, _ = self.elmo.batch_to_embeddings(batch_tokens)
+        embedding = embedding.detach()
 
-        for idx, (line, embedding) in enumerate(zip(lines, embedded)):
-            tokens = line.tokens[self.word_tokens_namespace]
-            line_embeddings = []
-            padding_length = max_len - len(tokens)
-            embedding = torch.FloatTensor(embedding)
-            embedding = embedding.to(self.device)
-
-            # 3, #words_in_sentence, 1024
+        # aggregate of word embeddings
+        if self.layer_aggregation_type == "sum":
+            # batch_size, max_num_words, 1024
+            embedding = torch.sum(embedding, dim=1)
 
-            # aggregate of word embeddings
-            if self.layer_aggregation_type == "sum":
-                # words_in_sentence, 1024
-                embedding = torch.sum(embedding, dim=0)
+        elif self.layer_aggregation_type == "average":
+            # mean across all layers
+            embedding = torch.mean(embedding, dim=1)
 
-            elif self.layer_aggregation_type == "average":
-                # mean across all layers
-                embedding = torch.mean(embedding, dim=0)
+        elif self.layer_aggregation_type == "last":
+            # batch_size, max_num_words, 1024
+            embedding = embedding[:, -1, :, :]
 
-            elif self.layer_aggregation_type == "last":
-                # words_in_sentence, 1024
-                embedding = embedding[-1, :, :]
+        elif self.layer_aggregation_type == "first":
+            # batch_size, max_num_words, 1024
+            embedding = embedding[:, 0, :, :]
+        else:
+            raise ValueError(
+                f"Layer aggregation can be one of sum, average, last and first"
+            )
 
-            elif self.layer_aggregation_type == "first":
-                # words_in_sentence, 1024
-                embedding = embedding[0, :, :]
-            else:
-                raise ValueError(
-                    f"Layer aggregation can be one of sum, average, last and first"
-                )
+        # the layers are aggregated before moving the batch to the device
+        embedding = embedding.to(self.device)
 
-            for token, token_emb in zip(tokens, embedding):
+        for line, line_embedding in zip(lines, embedding):
+            tokens = line.tokens[self.word_tokens_namespace]
+            for token, token_emb in zip(tokens, line_embedding):
                 token.set_embedding(self.embedder_name, token_emb)
-                line_embeddings.append(token_emb)
-
-            # for batching
-            for i in range(padding_length):
-                zeros = torch.zeros(self.embedding_dimension, device=self.device)
-                line_embeddings.append(zeros)
-
-            line_embeddings = torch.stack(line_embeddings)
-            batch_embeddings.append(line_embeddings)
 
-        batch_embeddings = torch.stack(batch_embeddings)
-        return batch_embeddings
+        return embedding
 
     def get_embedding_dimension(self) -> int:
         return 1024
@@ -1,8 +1,17 @@
 import pathlib
-from typing import List, Dict, Any, Tuple
+import contextlib
+import concurrent.futures
+import functools
+import math
+import os
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple, Iterator
 import wasabi
 import spacy
 from spacy.tokens import span
+from spacy.tokens import Doc
+from spacy.attrs import IS_SPACE, SENT_START
+import numpy as np
 import sciwing.constants as constants
 from spacy.gold import biluo_tags_from_offsets
 from spacy.gold import offsets_from_biluo_tags
@@ -17,7 +26,14 @@ class ScienceIEDataUtils:
         This class is a utility for various operations on the competitions data files.
     """
 
-    def __init__(self, folderpath: pathlib.Path, ignore_warnings=False):
+    def __init__(
+        self,
+        folderpath: pathlib.Path,
+        ignore_warnings=False,
+        doc_cache_size: int = 128,
+        file_ids: List[str] = None,
+        spacy_model: str = "en_core_web_sm",
+    ):
         """ Given the folderpath where the ScienceIE data is stored, this class provides various
         utilities. For more information on the dataset you can refer to https://scienceie.github.io/
 
@@ -28,15 +44,32 @@ class ScienceIEDataUtils:
         ignore_warnings : bool
             If True, then all the warnings generated by this class for inconsistencies in the
             data is ignored
+        doc_cache_size : int
+            The maximum number of parsed spacy docs that are cached. Every file is
+            parsed only once for all the entity types as long as its doc is in cache
+        file_ids : List[str]
+            The file ids to be used. If None, all the file ids in the folder are used
+        spacy_model : str
+            The spacy model used for tokenizing the text
 
         """
         self.folderpath = folderpath
         self.ignore_warning = ignore_warnings
         self.entity_types = ["Process", "Material", "Task"]
-        self.file_ids = self.get_file_ids()
+        self.file_ids = self.get_file_ids() if file_ids is None else file_ids
         self.msg_printer = wasabi.Printer()
-        self.nlp = spacy.load("en_core_web_sm")
+        # only the tokens and the sentence boundaries are required
+        # the rule based sentencizer replaces the dependency parser for the boundaries
+        self.spacy_model = spacy_model
+        self.nlp = spacy.load(self.spacy_model, disable=["tagger", "parser", "ner"])
+        self.nlp.add_pipe(self.nlp.create_pipe("sentencizer"))
         self._conll_col_sep = " "
+        self._merge_buffer_size = 10000
+        self._write_buffer_size = 1 << 20
+        self._doc_cache_size = doc_cache_size
+        self._doc_cache: Dict[str, Doc] = OrderedDict()
+        self._text_cache: Dict[str, str] = {}
+        self._ann_cache: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
 
     def get_file_ids(self) -> List[str]:
         """ Get all the file ids from the folder
@@ -44,16 +77,17 @@ class ScienceIEDataUtils:
         Returns
         -------
         List[str]
-            A List of File ids in the folder
+            A sorted List of File ids in the folder
 
         """
-        file_ids = [file.stem for file in self.folderpath.iterdir()]
-        file_ids = set(file_ids)
-        file_ids = list(file_ids)
+        # every file id has a .txt and a .ann file.
+        # sorting keeps the order of the files same across runs
+        file_ids = sorted({file.stem for file in self.folderpath.iterdir()})
         return file_ids
 
     def get_text_from_fileid(self, file_id: str) -> str:
-        """ Given a file id return the text from the file
+        """ Given a file id return the text from the file. The file is read
+        only once and the text is cached
 
         Parameters
         ----------
@@ -66,13 +100,134 @@ class ScienceIEDataUtils:
             Text read from the file
 
         """
-        path = self.folderpath.joinpath(f"{file_id}.txt")
-        with open(path, "r") as fp:
-            text = fp.readline()
-            text = text.strip()
+        text = self._text_cache.get(file_id)
+        if text is None:
+            path = self.folderpath.joinpath(f"{file_id}.txt")
+            # only the first line of the file holds the text
+            text = path.read_text().partition("\n")[0].strip()
+            self._text_cache[file_id] = text
 
         return text
 
+    def _get_doc(self, file_id: str) -> Doc:
+        """ Returns the spacy doc for the text of the file. The docs are cached
+        in a LRU fashion so that the same text is not parsed once for every entity type
+
+        Parameters
+        ----------
+        file_id : str
+            A ScienceIE data file id
+
+        Returns
+        -------
+        Doc
+            The spacy doc of the text in the file
+
+        """
+        doc = self._doc_cache.get(file_id)
+        if doc is not None:
+            self._doc_cache.move_to_end(file_id)
+            return doc
+
+        text = self.get_text_from_fileid(file_id)
+        doc = self.nlp(text)
+        self._doc_cache[file_id] = doc
+        if len(self._doc_cache) > self._doc_cache_size:
+            self._doc_cache.popitem(last=False)
+        return doc
+
+    def _get_tag_suffixes(self, tags: List[str]) -> Dict[str, str]:
+        """ Forms the ``sep tag sep tag sep tag`` suffix of a BILOU line once for
+        every unique tag, instead of once for every token
+
+        Parameters
+        ----------
+        tags : List[str]
+            The BILOU tags of the tokens
+
+        Returns
+        -------
+        Dict[str, str]
+            A mapping from the tag to the suffix of the BILOU line
+
+        """
+        sep = self._conll_col_sep
+        return {tag: f"{sep}{tag}{sep}{tag}{sep}{tag}" for tag in set(tags)}
+
+    @staticmethod
+    def _add_o_tags(tags: List[str], entity: str) -> List[str]:
+        """ Maps the ``O`` and the ``-`` tags from spacy to ``O-entity``
+
+        Parameters
+        ----------
+        tags : List[str]
+            The BILOU tags obtained from spacy
+        entity : str
+            The entity for which the tags are obtained
+
+        Returns
+        -------
+        List[str]
+            The BILOU tags where tokens outside an entity are tagged ``O-entity``
+
+        """
+        o_tag = f"O-{entity}"
+        return [o_tag if tag[0] == "O" or tag == "-" else tag for tag in tags]
+
+    def _get_all_annotations(self, file_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """ Reads the annotation file once and buckets the annotations by their tag.
+        The result is cached for the file id
+
+        Parameters
+        ----------
+        file_id : str
+            A ScienceIE file id
+
+        Returns
+        -------
+        Dict[str, List[Dict[str, Any]]]
+            A mapping from the lower cased tag to the annotations of the tag.
+            Every annotation is a dictionary similar to the one returned by
+            ``_get_annotations_for_entity``
+
+        """
+        all_annotations = self._ann_cache.get(file_id)
+        if all_annotations is not None:
+            return all_annotations
+
+        all_annotations = {}
+        annotation_filepath = self.folderpath.joinpath(f"{file_id}.ann")
+        with open(annotation_filepath, "r") as fp:
+            for line in fp:
+                # only the entity lines start with T and are of the form
+                # entity_number \t tag start end \t words
+                if not line.startswith("T"):
+                    continue
+                entity_number, _, rest = line.partition("\t")
+                tag_start_end, sep, words = rest.partition("\t")
+                if not sep or "\t" in words:
+                    continue
+
+                tag_start_end = tag_start_end.split()
+                if len(tag_start_end) != 3:
+                    self.msg_printer.warn(
+                        f"Skipping LINE:{line} from file_id {file_id}",
+                        show=not self.ignore_warning,
+                    )
+                    continue
+                tag, start, end = tag_start_end
+                annotation = {
+                    "start": int(start),
+                    "end": int(end),
+                    "words": words,
+                    "entity_number": entity_number,
+                    "tag": tag,
+                }
+                all_annotations.setdefault(tag.lower(), []).append(annotation)
+
+        self._ann_cache[file_id] = all_annotations
+        return all_annotations
+
     def _get_annotations_for_entity(
         self, file_id: str, entity: str
     ) -> List[Dict[str, Any]]:
@@ -101,30 +256,7 @@ class ScienceIEDataUtils:
                     The tag associated with the set of tags
 
         """
-        annotations = []
-        annotation_filepath = self.folderpath.joinpath(f"{file_id}.ann")
-        with open(annotation_filepath, "r") as fp:
-            for line in fp:
-                if line.strip().startswith("T") and len(line.split("\t")) == 3:
-                    entity_number, tag_start_end, words = line.split("\t")
-                    if len(tag_start_end.split()) != 3:
-                        self.msg_printer.warn(
-                            f"Skipping LINE:{line} from file_id {file_id} for ENTITY:{entity}",
-                            show=not self.ignore_warning,
-                        )
-                        continue
-                    tag, start, end = tag_start_end.split()
-                    start = int(start)
-                    end = int(end)
-                    if tag.lower() == entity.lower():
-                        annotation = {
-                            "start": start,
-                            "end": end,
-                            "words": words,
-                            "entity_number": entity_number,
-                            "tag": tag,
-                        }
-                        annotations.append(annotation)
+        annotations = self._get_all_annotations(file_id).get(entity.lower(), [])
 
         if len(annotations) == 0:
             self.msg_printer.warn(
@@ -133,7 +265,7 @@ class ScienceIEDataUtils:
             )
         return annotations
 
-    def get_bilou_lines_for_entity(self, file_id: str, entity: str):
+    def get_bilou_lines_for_entity(self, file_id: str, entity: str, doc: Doc = None):
         """ Writes conll file for the entity type
 
         Parameters
@@ -142,6 +274,9 @@ class ScienceIEDataUtils:
             File id of the annotation file
         entity : str
             The entity for which conll file is written
+        doc : Doc
+            The parsed spacy doc of the file. If None, the doc is parsed
+            or fetched from the cache
 
         Returns
         --------
@@ -150,14 +285,19 @@ class ScienceIEDataUtils:
 
         """
         annotations = self._get_annotations_for_entity(file_id=file_id, entity=entity)
-        text = self.get_text_from_fileid(file_id)
+        if doc is None:
+            doc = self._get_doc(file_id)
 
         return self._get_bilou_lines_for_entity(
-            text=text, annotations=annotations, entity=entity
+            text=doc.text, annotations=annotations, entity=entity, doc=doc
         )
 
     def _get_bilou_lines_for_entity(
-        self, text: str, annotations: List[Dict[str, Any]], entity: str
+        self,
+        text: str,
+        annotations: List[Dict[str, Any]],
+        entity: str,
+        doc: Doc = None,
     ) -> List[str]:
         """ The list of BILOU lines for entity
 
@@ -169,6 +309,8 @@ class ScienceIEDataUtils:
             The list of annotations where every annotation is a dictionary
         entity : str
             A particular entity for which the BILOU lines are returned
+        doc : Doc
+            The spacy doc for the text if it is already parsed
 
         Returns
         -------
@@ -176,6 +318,37 @@ class ScienceIEDataUtils:
             The list of BILOU tagged lines, where every line is a ``word, tag, tag, tag`` where
             the tag is decided by the entity.
 
+        """
+        if doc is None:
+            doc = self.nlp(text)
+        tags = self._get_bilou_tags(doc=doc, annotations=annotations, entity=entity)
+        sentences = self._get_sentence_token_idxs(doc=doc, is_sentence_wise=False)
+        words = [token.text for token in doc]
+        bilou_lines = self._form_bilou_lines(
+            words=words, tags=tags, sentences=sentences
+        )
+
+        return bilou_lines[0]
+
+    def _get_bilou_tags(
+        self, doc: Doc, annotations: List[Dict[str, Any]], entity: str
+    ) -> List[str]:
+        """ Returns the BILOU tag for every token in the doc
+
+        Parameters
+        ----------
+        doc : Doc
+            The spacy doc of the text
+        annotations : List[Dict[str, Any]]
+            The list of annotations where every annotation is a dictionary
+        entity : str
+            A particular entity for which the BILOU tags are returned
+
+        Returns
+        -------
+        List[str]
+            The BILOU tag for every token in the doc
+
         """
         entities = []
         for annotation in annotations:
@@ -184,25 +357,132 @@ class ScienceIEDataUtils:
             tag = annotation["tag"]
             entities.append((start, end, tag))
 
-        doc = self.nlp(text)
+        # using spacys converter to convert biluo tags from offsets
         tags = biluo_tags_from_offsets(doc, entities)
-        tags = map(
-            lambda tag: f"O-{entity}" if tag.startswith("O") or tag == "-" else tag,
-            tags,
-        )
-        tags = list(tags)
 
-        bilou_lines = []
+        # spacy does not provide the O-tags
+        # adding it
+        # spacy provides a - if there is mismatch between the offsets in the entities
+        # and the tokenization. We are mapping it to O in this case
+        return self._add_o_tags(tags=tags, entity=entity)
 
-        for token, tag in zip(doc, tags):
-            if not token.is_space:
-                bilou_line = f"{token.text}{self._conll_col_sep}{self._conll_col_sep.join([tag] * 3)}"
-                bilou_lines.append(bilou_line)
+    @staticmethod
+    def _get_sentence_token_idxs(doc: Doc, is_sentence_wise: bool) -> List[List[int]]:
+        """ Groups the indices of the tokens of the doc into sentences.
+        The space tokens are left out as they are not written in the BILOU lines
 
-        return bilou_lines
+        Parameters
+        ----------
+        doc : Doc
+            The spacy doc of the text
+        is_sentence_wise : bool
+            If False, all the tokens are considered to be one sentence
+
+        Returns
+        -------
+        List[List[int]]
+            The indices of the non space tokens for every sentence
+
+        """
+        # the is_space and the sent_start attributes of all the tokens in one call
+        token_attrs = doc.to_array([IS_SPACE, SENT_START])
+        not_space = token_attrs[:, 0] == 0
+        token_idxs = np.arange(len(doc))
+
+        if not is_sentence_wise:
+            return [token_idxs[not_space].tolist()]
+
+        # the first token always begins the first sentence
+        sent_starts = np.flatnonzero(token_attrs[:, 1] == 1)
+        sent_starts = sent_starts[sent_starts > 0]
+
+        # avoid adding space to the bilou lines.
+        sentences = [
+            sentence[not_space[sentence]].tolist()
+            for sentence in np.split(token_idxs, sent_starts)
+        ]
+        return sentences
+
+    def _form_bilou_lines(
+        self, words: List[str], tags: List[str], sentences: List[List[int]]
+    ) -> List[List[str]]:
+        """ Forms the ``word tag tag tag`` lines for every sentence
+
+        Parameters
+        ----------
+        words : List[str]
+            The text of every token in the doc
+        tags : List[str]
+            The BILOU tag for every token in the doc
+        sentences : List[List[int]]
+            The indices of the tokens in every sentence
+
+        Returns
+        -------
+        List[List[str]]
+            The BILOU lines for every sentence
+
+        """
+        tag_suffixes = self._get_tag_suffixes(tags)
+        return [
+            [words[idx] + tag_suffixes[tags[idx]] for idx in sentence]
+            for sentence in sentences
+        ]
+
+    def _iter_bilou_texts(
+        self, file_ids: List[str], is_sentence_wise: bool, batch_size: int
+    ) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """ Yields the CoNLL text of every file for all the entity types
+
+        Parameters
+        ----------
+        file_ids : List[str]
+            The file ids for which the CoNLL text is formed
+        is_sentence_wise : bool
+            If True, the text of the file is broken into sentences
+        batch_size : int
+            The number of texts that are parsed together by spacy
+
+        Returns
+        -------
+        Iterator[Tuple[str, Dict[str, str]]]
+            The file id and a mapping from the entity type to the CoNLL text of the file
+
+        """
+        # parse the texts in batches and only once for all the entity types
+        texts = (self.get_text_from_fileid(file_id) for file_id in file_ids)
+        docs = self.nlp.pipe(texts, batch_size=batch_size)
+        for file_id, doc in zip(file_ids, docs):
+            # the sentences and the words are found once and the tags for all
+            # the entity types are formed against them
+            sentences = self._get_sentence_token_idxs(
+                doc=doc, is_sentence_wise=is_sentence_wise
+            )
+            words = [token.text for token in doc]
+            entity_texts = {}
+            for entity_type in self.entity_types:
+                annotations = self._get_annotations_for_entity(
+                    file_id=file_id, entity=entity_type
+                )
+                tags = self._get_bilou_tags(
+                    doc=doc, annotations=annotations, entity=entity_type
+                )
+                bilou_lines = self._form_bilou_lines(
+                    words=words, tags=tags, sentences=sentences
+                )
+
+                # Sentences are separated by an empty line
+                entity_texts[entity_type] = (
+                    "\n\n".join("\n".join(line) for line in bilou_lines) + "\n\n"
+                )
+            yield file_id, entity_texts
 
     def write_bilou_lines(
-        self, out_filename: pathlib.Path, is_sentence_wise: bool = False
+        self,
+        out_filename: pathlib.Path,
+        is_sentence_wise: bool = False,
+        batch_size: int = 64,
+        num_workers: int = 1,
     ):
         """ Writes bilou lines in the out_filename for all the files in ``self.folderpath``.
         The output file will contain every word on one line with their tag in BILOU format.
@@ -218,38 +498,67 @@ class ScienceIEDataUtils:
         is_sentence_wise : bool
             You can write the BILOU lines sentence wise. The text in all the ScienceIE files
             will be broken into sentences, and the sentences will be tagged with BILOU tags
+        batch_size : int
+            The number of texts that are parsed together by spacy
+        num_workers : int
+            The number of processes used to form the BILOU lines. The files are split
+            into contiguous chunks and every process loads its own spacy model.
+            If 1, then all the files are processed in the current process
 
         Returns
         -------
 
         """
         filename_stem = out_filename.stem
-        with self.msg_printer.loading(f"Writing BILOU Lines For ScienceIE"):
+        with self.msg_printer.loading(
+            f"Writing BILOU Lines For ScienceIE"
+        ), contextlib.ExitStack() as stack:
+            # all the entity files are written in a single pass over the files
+            out_fps = {}
             for entity_type in self.entity_types:
                 out_filename = pathlib.Path(
                     DATA_DIR, f"{filename_stem}_{entity_type.lower()}_conll.txt"
                 )
-                with open(out_filename, "w") as fp:
-                    for file_id in self.file_ids:
-                        # split the text into sentences and then write
-                        if is_sentence_wise:
-                            bilou_lines = self.get_sentence_wise_bilou_lines(
-                                file_id=file_id, entity_type=entity_type
-                            )
-                        else:
-                            bilou_lines = self.get_bilou_lines_for_entity(
-                                file_id=file_id, entity=entity_type
-                            )
-                            bilou_lines = [bilou_lines]
-
-                        for line in bilou_lines:
-                            fp.write("\n".join(line))
-                            fp.write("\n\n")
+                out_fps[entity_type] = stack.enter_context(
+                    open(out_filename, "w", buffering=self._write_buffer_size)
+                )
+
+            if num_workers > 1 and len(self.file_ids) > 1:
+                chunk_size = math.ceil(len(self.file_ids) / num_workers)
+                chunks = [
+                    self.file_ids[idx : idx + chunk_size]
+                    for idx in range(0, len(self.file_ids), chunk_size)
+                ]
+                worker = functools.partial(
+                    _bilou_texts_worker,
+                    self.folderpath,
+                    self.ignore_warning,
+                    self.spacy_model,
+                    self._doc_cache_size,
+                    is_sentence_wise,
+                    batch_size,
+                )
+                executor = stack.enter_context(
+                    concurrent.futures.ProcessPoolExecutor(max_workers=len(chunks))
+                )
+                # the results are returned in the order of the chunks
+                for entity_texts in executor.map(worker, chunks):
+                    for entity_type, text in entity_texts.items():
+                        out_fps[entity_type].write(text)
+            else:
+                for _, entity_texts in self._iter_bilou_texts(
+                    file_ids=self.file_ids,
+                    is_sentence_wise=is_sentence_wise,
+                    batch_size=batch_size,
+                ):
+                    # one write per file and entity type
+                    for entity_type, text in entity_texts.items():
+                        out_fps[entity_type].write(text)
 
         self.msg_printer.good("Finished writing BILOU Lines For ScienceIE")
 
     def get_sentence_wise_bilou_lines(
-        self, file_id: str, entity_type: str
+        self, file_id: str, entity_type: str, doc: Doc = None
     ) -> List[List[str]]:
         """ Get BILOU lines sentence-wise
 
@@ -259,6 +568,9 @@ class ScienceIEDataUtils:
             File id from ScienceIE Dataset
         entity_type : str
             One of ``['Task', 'Process', 'Material']``
+        doc : Doc
+            The parsed spacy doc of the file. If None, the doc is parsed
+            or fetched from the cache
 
         Returns
         -------
@@ -270,65 +582,19 @@ class ScienceIEDataUtils:
         annotations = self._get_annotations_for_entity(
             file_id=file_id, entity=entity_type
         )
-        text = self.get_text_from_fileid(file_id)
+        if doc is None:
+            doc = self._get_doc(file_id)
 
-        entities = []
-        for annotation in annotations:
-            start = annotation["start"]
-            end = annotation["end"]
-            tag = annotation["tag"]
-            entities.append((start, end, tag))
-
-        doc = self.nlp(text)
-
-        # using spacys converter to convert biluo tags from offsets
-        tags = biluo_tags_from_offsets(doc, entities)
-
-        # spacy does not provide the O-tags
-        # adding it
-        # spacy provides a - if there is mismatch between the offsets in the entities
-        # and the tokenization. We are mapping it to O in this case
-        tags = map(
-            lambda tag: f"O-{entity_type}"
-            if tag.startswith("O") or tag == "-"
-            else tag,
-            tags,
+        tags = self._get_bilou_tags(
+            doc=doc, annotations=annotations, entity=entity_type
         )
-        tags = list(tags)
-
-        sentences = []
 
         # marking the boundaries of sentences
-        if not doc[0].is_space:
-            current_sent = [f"{doc[0].text} {self._conll_col_sep.join([tags[0]] * 3)}"]
-        else:
-            current_sent = []
-
-        for tag, token in zip(tags[1:], doc[1:]):
-            # if the token is the beginning of a sentence
-            # add the currently accumulated sentence to the sentences
-            if token.is_sent_start:
-                sentences.append(current_sent)
-
-                # avoid adding space to the bilou lines.
-                if not token.is_space:
-                    current_sent = [
-                        f"{token.text}{self._conll_col_sep}{self._conll_col_sep.join([tag] * 3)}"
-                    ]
-
-            # if the token is not the start of a sentence
-            # THen accumulate the current sentence unitl the next sentence
-            else:
-                # avoiding situations where space is not there
-                if not token.is_space:
-                    current_sent.append(
-                        f"{token.text}{self._conll_col_sep}{self._conll_col_sep.join([tag] * 3)}"
-                    )
-
-        # finally add the last sentence
-        sentences.append(current_sent)
+        sentences = self._get_sentence_token_idxs(doc=doc, is_sentence_wise=True)
+        words = [token.text for token in doc]
+        sentences = self._form_bilou_lines(words=words, tags=tags, sentences=sentences)
 
-        assert len(sentences) == len(list(doc.sents))
+        assert len(sentences) == sum(1 for _ in doc.sents)
 
         return sentences
 
@@ -362,30 +628,35 @@ class ScienceIEDataUtils:
         ) as out_fp:
 
             with self.msg_printer.loading("Merging Task Process and Material Files"):
+                sep = self._conll_col_sep
+                buffer = []
                 for task_line, process_line, material_line in zip(
                     task_fp, process_fp, material_fp
                 ):
-                    if bool(task_line.strip()):
-                        word, _, _, task_tag = task_line.strip().split(
-                            self._conll_col_sep
-                        )
-                        word, _, _, process_tag = process_line.strip().split(
-                            self._conll_col_sep
-                        )
-                        word, _, _, material_tag = material_line.strip().split(
-                            self._conll_col_sep
-                        )
-                        out_fp.write(
-                            self._conll_col_sep.join(
-                                [word, task_tag, process_tag, material_tag]
-                            )
+                    task_line = task_line.strip()
+                    if task_line:
+                        # every line is word tag tag tag. Only the word and
+                        # the last tag are required
+                        word, _, _, task_tag = task_line.split(sep)
+                        _, _, _, process_tag = process_line.strip().split(sep)
+                        _, _, _, material_tag = material_line.strip().split(sep)
+                        buffer.append(
+                            sep.join((word, task_tag, process_tag, material_tag))
                         )
-                        out_fp.write("\n")
                     else:
+                        buffer.append("")
+
+                    if len(buffer) >= self._merge_buffer_size:
+                        out_fp.write("\n".join(buffer))
                         out_fp.write("\n")
+                        buffer = []
+
+                if buffer:
+                    out_fp.write("\n".join(buffer))
+                    out_fp.write("\n")
             self.msg_printer.good("Finished Merging Task Process and Material Files")
 
-    def get_sents(self, text: str) -> List[span.Span]:
+    def get_sents(self, text: str) -> Iterator[span.Span]:
         """ Returns all the sentences in the text
 
         Parameters
@@ -394,34 +665,24 @@ class ScienceIEDataUtils:
 
         Returns
         -------
-        List[span.Span]
+        Iterator[span.Span]
             All the sentences in the text as a spacy span. A spacy span encodes more information
-            within
+            within. The sentences are formed lazily as they are iterated over
 
         """
         doc = self.nlp(text)
-        sents = doc.sents
-        sents = list(sents)
-        return sents
+        return doc.sents
 
     def write_ann_file_from_conll_file(
         self, conll_filepath: pathlib.Path, ann_filepath: pathlib.Path, text: str
     ):
-        words = []
-        task_tags = []
-        process_tags = []
-        material_tags = []
         with open(conll_filepath, "r") as fp:
-            for line in fp:
-                try:
-                    word, task_tag, process_tag, material_tag = line.split()
-                except ValueError:
-                    word = " "
-                    task_tag, process_tag, material_tag = line.split()
-                words.append(word)
-                task_tags.append(task_tag)
-                process_tags.append(process_tag)
-                material_tags.append(material_tag)
+            rows = [line.split() for line in fp]
+
+        # the word is missing from the line when the word is a whitespace
+        task_tags = [row[-3] for row in rows]
+        process_tags = [row[-2] for row in rows]
+        material_tags = [row[-1] for row in rows]
 
         doc = self.nlp(text)
 
@@ -495,6 +756,59 @@ class ScienceIEDataUtils:
         return ann_line
 
 
+def _bilou_texts_worker(
+    folderpath: pathlib.Path,
+    ignore_warnings: bool,
+    spacy_model: str,
+    doc_cache_size: int,
+    is_sentence_wise: bool,
+    batch_size: int,
+    file_ids: List[str],
+) -> Dict[str, str]:
+    """ Forms the CoNLL text for a chunk of ScienceIE files in a separate process.
+    The worker loads its own spacy model, but only for the files in its chunk
+
+    Parameters
+    ----------
+    folderpath : pathlib.Path
+        The path where the ScienceIE data is stored
+    ignore_warnings : bool
+        If True, then the warnings for inconsistencies in the data are ignored
+    spacy_model : str
+        The spacy model used by the parent for tokenizing the text
+    doc_cache_size : int
+        The maximum number of parsed spacy docs that are cached
+    is_sentence_wise : bool
+        If True, the text of every file is broken into sentences
+    batch_size : int
+        The number of texts that are parsed together by spacy
+    file_ids : List[str]
+        The chunk of file ids processed by the worker
+
+    Returns
+    -------
+    Dict[str, str]
+        A mapping from the entity type to the CoNLL text of all the files in the chunk
+
+    """
+    # the chunk of file ids is passed so that the folder is not listed again
+    utils = ScienceIEDataUtils(
+        folderpath=folderpath,
+        ignore_warnings=ignore_warnings,
+        doc_cache_size=doc_cache_size,
+        file_ids=file_ids,
+        spacy_model=spacy_model,
+    )
+    entity_texts = {entity_type: [] for entity_type in utils.entity_types}
+    for _, file_entity_texts in utils._iter_bilou_texts(
+        file_ids=file_ids, is_sentence_wise=is_sentence_wise, batch_size=batch_size
+    ):
+        for entity_type, text in file_entity_texts.items():
+            entity_texts[entity_type].append(text)
+
+    return {entity_type: "".join(texts) for entity_type, texts in entity_texts.items()}
+
+
 if __name__ == "__main__":
     import sciwing.constants as constants
 
@@ -505,7 +819,11 @@ if __name__ == "__main__":
         folderpath=pathlib.Path(SCIENCE_IE_TRAIN_FOLDER), ignore_warnings=True
     )
     output_filename = pathlib.Path(DATA_DIR, "train.txt")
-    utils.write_bilou_lines(out_filename=output_filename, is_sentence_wise=True)
+    utils.write_bilou_lines(
+        out_filename=output_filename,
+        is_sentence_wise=True,
+        num_workers=os.cpu_count(),
+    )
 
     utils.merge_files(
         pathlib.Path(DATA_DIR, "train_task_conll.txt"),
@@ -519,7 +837,11 @@ if __name__ == "__main__":
         folderpath=pathlib.Path(SCIENCE_IE_TRAIN_FOLDER), ignore_warnings=True
     )
     output_filename = pathlib.Path(DATA_DIR, "dev.txt")
-    utils.write_bilou_lines(out_filename=output_filename, is_sentence_wise=True)
+    utils.write_bilou_lines(
+        out_filename=output_filename,
+        is_sentence_wise=True,
+        num_workers=os.cpu_count(),
+    )
 
     utils.merge_files(
         pathlib.Path(DATA_DIR, "dev_task_conll.txt"),
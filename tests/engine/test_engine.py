@@ -86,6 +86,48 @@ def setup_engine_test_with_simple_classifier(
     return engine
 
 
+@pytest.fixture(
+    params=[
+        "cpu",
+        pytest.param(
+            "cuda",
+            marks=pytest.mark.skipif(
+                not torch.cuda.is_available(), reason="cuda is not available"
+            ),
+        ),
+    ]
+)
+def setup_engine_with_device(request, clf_datasets_manager, tmpdir_factory):
+    device = torch.device(request.param)
+    datasets_manager = clf_datasets_manager
+    word_embedder = WordEmbedder(embedding_type="glove_6B_50", device=device)
+    bow_encoder = BOW_Encoder(embedder=word_embedder, device=device)
+    classifier = SimpleClassifier(
+        encoder=bow_encoder,
+        encoding_dim=word_embedder.get_embedding_dimension(),
+        num_classes=2,
+        classification_layer_bias=True,
+        datasets_manager=datasets_manager,
+        device=device,
+    )
+    engine = Engine(
+        model=classifier,
+        datasets_manager=datasets_manager,
+        optimizer=torch.optim.Adam(params=classifier.parameters()),
+        batch_size=1,
+        save_dir=tmpdir_factory.mktemp("experiment_device"),
+        num_epochs=1,
+        save_every=1,
+        log_train_metrics_every=10,
+        train_metric=PrecisionRecallFMeasure(datasets_manager=datasets_manager),
+        validation_metric=PrecisionRecallFMeasure(datasets_manager=datasets_manager),
+        test_metric=PrecisionRecallFMeasure(datasets_manager=datasets_manager),
+        device=device,
+        pin_memory=True,
+    )
+    return engine, device
+
+
 class TestEngine:
     def test_train_loader(self, setup_engine_test_with_simple_classifier):
         engine = setup_engine_test_with_simple_classifier
@@ -133,5 +175,12 @@ class TestEngine:
         except:
             pytest.fail("Engine train epoch end failed")
 
+    def test_pin_memory_only_for_cuda(self, setup_engine_with_device):
+        engine, device = setup_engine_with_device
+        expected_pin_memory = device.type == "cuda"
+        assert engine.train_loader.pin_memory == expected_pin_memory
+        assert engine.validation_loader.pin_memory == expected_pin_memory
+        assert engine.test_loader.pin_memory == expected_pin_memory
+
     def test_engine_in_class_nursery(self):
         assert ClassNursery.class_nursery["Engine"] is not None
@@ -40,3 +40,16 @@ class TestBowElmoEncoder:
             for token in tokens:
                 assert isinstance(token.get_embedding("elmo"), torch.FloatTensor)
                 assert token.get_embedding("elmo").size(0) == 1024
+
+    @pytest.mark.slow
+    def test_cached_vocab_embeddings(self, setup_bow_elmo_encoder):
+        bow_elmo_embedder, lines = setup_bow_elmo_encoder
+        vocab = [tok.text for line in lines for tok in line.tokens["tokens"]]
+        cached_embedder = BowElmoEmbedder(
+            layer_aggregation=bow_elmo_embedder.layer_aggregation_type,
+            vocab_to_cache=vocab,
+        )
+        embedding = bow_elmo_embedder(lines)
+        cached_embedding = cached_embedder(lines)
+        assert cached_embedding.size() == embedding.size()
+        assert torch.allclose(cached_embedding, embedding, atol=1e-4)
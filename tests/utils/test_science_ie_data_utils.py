@@ -1,5 +1,6 @@
 import sciwing.constants as constants
 import pytest
+import sciwing.utils.science_ie_data_utils as science_ie_data_utils
 from sciwing.utils.science_ie_data_utils import ScienceIEDataUtils
 import pathlib
 from collections import Counter
@@ -22,6 +23,11 @@ class TestScienceIEDataUtils:
         counter_file_ids = Counter(file_ids)
         assert all([count == 1 for count in counter_file_ids.values()])
 
+    def test_file_ids_sorted(self, setup_science_ie_train_data_utils):
+        utils = setup_science_ie_train_data_utils
+        file_ids = utils.get_file_ids()
+        assert file_ids == sorted(file_ids)
+
     def test_all_text_read(self, setup_science_ie_train_data_utils):
         utils = setup_science_ie_train_data_utils
         file_ids = utils.get_file_ids()
@@ -29,6 +35,13 @@ class TestScienceIEDataUtils:
             text = utils.get_text_from_fileid(file_id)
             assert len(text) > 0
 
+    def test_doc_parsed_once(self, setup_science_ie_train_data_utils):
+        utils = setup_science_ie_train_data_utils
+        file_id = utils.file_ids[0]
+        doc = utils._get_doc(file_id)
+        assert utils._get_doc(file_id) is doc
+        assert doc.text == utils.get_text_from_fileid(file_id)
+
     @pytest.mark.parametrize("entity_type", ["Task", "Process", "Material"])
     def test_get_annotations_for_entity(
         self, setup_science_ie_train_data_utils, entity_type
@@ -230,6 +243,166 @@ class TestScienceIEDataUtils:
         except:
             pytest.fail("Failed to run bilou lines")
 
+    @pytest.mark.parametrize(
+        "is_sentence_wise, expected_idxs",
+        [(True, [[0, 1, 2], [3, 4, 5]]), (False, [[0, 1, 2, 3, 4, 5]])],
+    )
+    def test_get_sentence_token_idxs(
+        self, setup_science_ie_train_data_utils, is_sentence_wise, expected_idxs
+    ):
+        utils = setup_science_ie_train_data_utils
+        doc = utils.nlp("Word one. Word two.")
+        sentence_idxs = utils._get_sentence_token_idxs(
+            doc=doc, is_sentence_wise=is_sentence_wise
+        )
+        assert sentence_idxs == expected_idxs
+
+    @pytest.mark.parametrize(
+        "text, expected_sentences",
+        [
+            (
+                "word. word",
+                [
+                    [
+                        "word U-Process U-Process U-Process",
+                        ". O-Process O-Process O-Process",
+                    ],
+                    ["word O-Process O-Process O-Process"],
+                ],
+            ),
+            # the space token starts the second sentence and is not written
+            (
+                "word.  word",
+                [
+                    [
+                        "word U-Process U-Process U-Process",
+                        ". O-Process O-Process O-Process",
+                    ],
+                    ["word O-Process O-Process O-Process"],
+                ],
+            ),
+        ],
+    )
+    def test_get_sentence_wise_bilou_lines(self, tmpdir, text, expected_sentences):
+        dummy_dir = tmpdir.mkdir("fake_science_ie")
+        dummy_dir.join("dummy.txt").write(text)
+        dummy_dir.join("dummy.ann").write("T1\tProcess 0 4\tword\n")
+
+        utils = ScienceIEDataUtils(pathlib.Path(dummy_dir), ignore_warnings=True)
+        sentences = utils.get_sentence_wise_bilou_lines(
+            file_id="dummy", entity_type="Process"
+        )
+        assert sentences == expected_sentences
+
+    @pytest.mark.parametrize("is_sentence_wise", [True, False])
+    def test_iter_bilou_texts_same_as_bilou_lines(
+        self, setup_science_ie_train_data_utils, is_sentence_wise
+    ):
+        utils = setup_science_ie_train_data_utils
+        file_ids = utils.file_ids[:5]
+        for file_id, entity_texts in utils._iter_bilou_texts(
+            file_ids=file_ids, is_sentence_wise=is_sentence_wise, batch_size=2
+        ):
+            for entity_type in utils.entity_types:
+                if is_sentence_wise:
+                    bilou_lines = utils.get_sentence_wise_bilou_lines(
+                        file_id=file_id, entity_type=entity_type
+                    )
+                else:
+                    bilou_lines = [
+                        utils.get_bilou_lines_for_entity(
+                            file_id=file_id, entity=entity_type
+                        )
+                    ]
+                expected_text = "".join(
+                    "\n".join(line) + "\n\n" for line in bilou_lines
+                )
+                assert entity_texts[entity_type] == expected_text
+
+    @pytest.mark.parametrize("merge_buffer_size", [1, 2, 10000])
+    def test_merge_files(
+        self, tmpdir, setup_science_ie_train_data_utils, merge_buffer_size
+    ):
+        utils = setup_science_ie_train_data_utils
+        utils._merge_buffer_size = merge_buffer_size
+
+        entity_lines = {}
+        for entity in ["Task", "Process", "Material"]:
+            entity_lines[entity] = [
+                f"word U-{entity} U-{entity} U-{entity}",
+                f"word O-{entity} O-{entity} O-{entity}",
+                "",
+                f"word B-{entity} B-{entity} B-{entity}",
+                f"word L-{entity} L-{entity} L-{entity}",
+                "",
+            ]
+
+        dummy_dir = tmpdir.mkdir("fake_dir")
+        filenames = {}
+        for entity, lines in entity_lines.items():
+            filename = dummy_dir.join(f"{entity.lower()}.conll")
+            filename.write("\n".join(lines) + "\n")
+            filenames[entity] = pathlib.Path(filename)
+        out_filename = pathlib.Path(dummy_dir.join("merged.conll"))
+
+        utils.merge_files(
+            task_filename=filenames["Task"],
+            process_filename=filenames["Process"],
+            material_filename=filenames["Material"],
+            out_filename=out_filename,
+        )
+
+        expected_lines = [
+            "word U-Task U-Process U-Material",
+            "word O-Task O-Process O-Material",
+            "",
+            "word B-Task B-Process B-Material",
+            "word L-Task L-Process L-Material",
+            "",
+        ]
+        with open(out_filename) as fp:
+            assert fp.read() == "\n".join(expected_lines) + "\n"
+
+    def test_merge_files_fails_on_extra_columns(
+        self, tmpdir, setup_science_ie_train_data_utils
+    ):
+        utils = setup_science_ie_train_data_utils
+        dummy_dir = tmpdir.mkdir("fake_dir")
+        filenames = []
+        for entity in ["task", "process", "material"]:
+            filename = dummy_dir.join(f"{entity}.conll")
+            filename.write("word O O O O\n")
+            filenames.append(pathlib.Path(filename))
+
+        with pytest.raises(ValueError):
+            utils.merge_files(
+                *filenames, out_filename=pathlib.Path(dummy_dir.join("merged.conll"))
+            )
+
+    @pytest.mark.parametrize("is_sentence_wise", [True, False])
+    def test_write_bilou_lines_same_for_num_workers(
+        self, tmpdir, monkeypatch, setup_science_ie_train_data_utils, is_sentence_wise
+    ):
+        utils = setup_science_ie_train_data_utils
+        utils.file_ids = utils.file_ids[:5]
+
+        written_texts = {}
+        for num_workers in [1, 2]:
+            out_dir = tmpdir.mkdir(f"workers_{num_workers}")
+            monkeypatch.setattr(science_ie_data_utils, "DATA_DIR", str(out_dir))
+            utils.write_bilou_lines(
+                out_filename=pathlib.Path(out_dir, "train.txt"),
+                is_sentence_wise=is_sentence_wise,
+                num_workers=num_workers,
+            )
+            written_texts[num_workers] = {}
+            for entity_type in utils.entity_types:
+                out_filename = out_dir.join(f"train_{entity_type.lower()}_conll.txt")
+                written_texts[num_workers][entity_type] = out_filename.read()
+
+        assert all(len(text) > 0 for text in written_texts[1].values())
+        assert written_texts[1] == written_texts[2]
+
     def test_write_ann_file_from_conll_file(
         self, tmpdir, setup_science_ie_train_data_utils
     ):